@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory
 import os
 from datetime import datetime
-from database import get_db_connection
+import repositorio
 
 app = Flask(__name__)
 app.secret_key = 'tu_clave_secreta_muy_segura_admin_12345'
@@ -9,12 +9,12 @@ app.secret_key = 'tu_clave_secreta_muy_segura_admin_12345'
 # ================= SISTEMA DE TOKENS DE SEGURIDAD =================
 def generar_token_seguridad(vendedor_id):
     """Genera un token único basado en las credenciales actuales"""
-    vendedor = obtener_vendedor(vendedor_id)
+    vendedor = repositorio.obtener_vendedor(vendedor_id)
     if not vendedor:
         return None
     
     # El token se basa en código + device_id + timestamp
-    credenciales = f"{vendedor_id}_{vendedor.get('device_id', '')}_{datetime.now().strftime('%Y%m%d%H')}"
+    credenciales = f"{vendedor_id}_{vendedor.device_id}_{datetime.now().strftime('%Y%m%d%H')}"
     return credenciales
 
 def verificar_token_seguridad(vendedor_id, token_almacenado):
@@ -23,118 +23,13 @@ def verificar_token_seguridad(vendedor_id, token_almacenado):
     return token_actual == token_almacenado
 
 # ================= FUNCIONES AUXILIARES =================
-def obtener_vendedor(codigo):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM vendedores WHERE codigo = %s", (codigo,))
-    result = cursor.fetchone()
-    conn.close()
-    
-    if result:
-        return {
-            'codigo': result[0],
-            'nombre': result[1],
-            'device_id': result[2],
-            'activo': result[3],
-            'es_admin': result[4],
-            'fecha_creacion': result[5],
-            'ultimo_acceso': result[6],
-            'accesos_totales': result[7]
-        }
-    return None
-
-def cargar_vendedores():
-    """Carga todos los vendedores desde la base de datos"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM vendedores")
-    results = cursor.fetchall()
-    conn.close()
-    
-    vendedores = {}
-    for result in results:
-        vendedores[result[0]] = {
-            'codigo': result[0],
-            'nombre': result[1],
-            'device_id': result[2],
-            'activo': result[3],
-            'es_admin': result[4],
-            'fecha_creacion': result[5],
-            'ultimo_acceso': result[6],
-            'accesos_totales': result[7]
-        }
-    return vendedores
-
-def actualizar_vendedor(codigo, datos):
-    """Actualiza los datos de un vendedor"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE vendedores 
-        SET nombre = %s, device_id = %s, activo = %s, es_admin = %s, ultimo_acceso = %s, accesos_totales = %s
-        WHERE codigo = %s
-    ''', (
-        datos['nombre'],
-        datos.get('device_id', ''),
-        datos.get('activo', True),
-        datos.get('es_admin', False),
-        datos.get('ultimo_acceso'),
-        datos.get('accesos_totales', 0),
-        codigo
-    ))
-    conn.commit()
-    conn.close()
-
-def crear_vendedor(codigo, datos):
-    """Crea un nuevo vendedor"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO vendedores 
-        (codigo, nombre, device_id, activo, es_admin, fecha_creacion, accesos_totales)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    ''', (
-        codigo,
-        datos['nombre'],
-        datos.get('device_id', ''),
-        datos.get('activo', True),
-        datos.get('es_admin', False),
-        datetime.now().isoformat(),
-        datos.get('accesos_totales', 0)
-    ))
-    conn.commit()
-    conn.close()
-
-def eliminar_vendedor_db(codigo):
-    """Elimina un vendedor de la base de datos"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM vendedores WHERE codigo = %s', (codigo,))
-    conn.commit()
-    conn.close()
-
 def registrar_acceso(vendedor_id, dispositivo, exitoso, ip=None):
     """Registra un intento de acceso en la base de datos"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO accesos (vendedor_id, dispositivo, exitoso, ip)
-        VALUES (%s, %s, %s, %s)
-    ''', (vendedor_id, dispositivo, exitoso, ip or request.remote_addr))
-    conn.commit()
-    conn.close()
+    repositorio.registrar_acceso(vendedor_id, dispositivo, exitoso, ip or request.remote_addr)
 
 def invalidar_sesiones_vendedor(vendedor_id):
     """Invalida TODAS las sesiones de un vendedor"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'UPDATE sesiones_activas SET activa = FALSE, fecha_fin = %s WHERE vendedor_id = %s AND activa = TRUE',
-        (datetime.now().isoformat(), vendedor_id)
-    )
-    sesiones_invalidadas = cursor.rowcount
-    conn.commit()
-    conn.close()
+    sesiones_invalidadas = repositorio.invalidar_sesiones(vendedor_id)
     print(f"🚫 INVALIDADAS {sesiones_invalidadas} SESIONES para {vendedor_id}")
     return sesiones_invalidadas
 
@@ -159,20 +54,20 @@ def vendedor_autenticado():
         return False
     
     # 2. Verificar que el vendedor existe y está activo
-    vendedor = obtener_vendedor(vendedor_id)
+    vendedor = repositorio.obtener_vendedor(vendedor_id)
     if not vendedor:
         print(f"❌ Vendedor {vendedor_id} no existe en BD")
         session.clear()
         return False
     
-    if not vendedor.get('activo', True):
+    if not vendedor.activo:
         print(f"❌ Vendedor {vendedor_id} está INACTIVO")
         session.clear()
         return False
     
     # 3. Verificar Device ID si está configurado
-    if vendedor.get('device_id') and vendedor['device_id'].strip():
-        if vendedor['device_id'] != dispositivo_actual:
+    if vendedor.device_id.strip():
+        if vendedor.device_id != dispositivo_actual:
             print(f"❌ Device ID no coincide para {vendedor_id}")
             session.clear()
             return False
@@ -196,50 +91,35 @@ def autenticar():
     codigo = request.form.get('codigo', '').strip().upper()
     dispositivo = request.form.get('dispositivo', '').strip()
     
-    vendedor = obtener_vendedor(codigo)
+    vendedor = repositorio.obtener_vendedor(codigo)
     
     if vendedor:
         # Verificar si está activo
-        if not vendedor.get('activo', True):
+        if not vendedor.activo:
             registrar_acceso(codigo, dispositivo, False)
             return render_template('login.html', 
                                 error="❌ Cuenta desactivada. Contacta al administrador.")
         
         # Verificar Device ID (solo si está configurado y no está vacío)
-        if vendedor.get('device_id') and vendedor['device_id'].strip():
-            if vendedor['device_id'] != dispositivo:
+        if vendedor.device_id.strip():
+            if vendedor.device_id != dispositivo:
                 registrar_acceso(codigo, dispositivo, False)
                 return render_template('login.html', 
                                     error="❌ Dispositivo no autorizado. Contacta al administrador.")
         
         # Login exitoso - CREAR SESIÓN CON TOKEN
         session['vendedor_id'] = codigo
-        session['vendedor_nombre'] = vendedor['nombre']
-        session['vendedor_device_id'] = vendedor.get('device_id', '')
+        session['vendedor_nombre'] = vendedor.nombre
+        session['vendedor_device_id'] = vendedor.device_id
         session['dispositivo_actual'] = dispositivo
-        session['es_admin'] = vendedor.get('es_admin', False)
+        session['es_admin'] = vendedor.es_admin
         session['token_seguridad'] = generar_token_seguridad(codigo)  # ✅ TOKEN CRÍTICO
         
-        # Registrar sesión activa
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Registrar sesión activa, último acceso y acceso exitoso
         sesion_id = f"{codigo}_{dispositivo}_{datetime.now().timestamp()}"
-        cursor.execute('''
-            INSERT INTO sesiones_activas (sesion_id, vendedor_id, dispositivo, ip)
-            VALUES (%s, %s, %s, %s)
-        ''', (sesion_id, codigo, dispositivo, request.remote_addr))
-        conn.commit()
-        conn.close()
-        
-        # Actualizar último acceso
-        vendedor['ultimo_acceso'] = datetime.now().isoformat()
-        vendedor['accesos_totales'] = vendedor.get('accesos_totales', 0) + 1
-        actualizar_vendedor(codigo, vendedor)
-        
-        # Registrar acceso exitoso
-        registrar_acceso(codigo, dispositivo, True)
+        repositorio.registrar_login(sesion_id, codigo, dispositivo, request.remote_addr)
         
-        if vendedor.get('es_admin', False):
+        if vendedor.es_admin:
             return redirect(url_for('admin_panel'))
         else:
             return redirect(url_for('distrimundoescolar'))
@@ -303,12 +183,12 @@ def agregar_vendedor():
     if not codigo or not nombre:
         return jsonify({'error': 'Código y nombre son requeridos'}), 400
     
-    vendedor_existente = obtener_vendedor(codigo)
+    vendedor_existente = repositorio.obtener_vendedor(codigo)
     if vendedor_existente:
         return jsonify({'error': 'El código ya existe'}), 400
     
     try:
-        crear_vendedor(codigo, {
+        repositorio.crear_vendedor(codigo, {
             'nombre': nombre,
             'device_id': device_id,
             'activo': True,
@@ -330,7 +210,7 @@ def editar_vendedor(codigo_actual):
     if not vendedor_autenticado() or not session.get('es_admin'):
         return jsonify({'error': 'No autorizado'}), 403
     
-    vendedor_actual = obtener_vendedor(codigo_actual)
+    vendedor_actual = repositorio.obtener_vendedor(codigo_actual)
     if not vendedor_actual:
         return jsonify({'error': 'Vendedor no encontrado'}), 404
     
@@ -342,7 +222,7 @@ def editar_vendedor(codigo_actual):
     
     # Detectar si es el usuario actual
     es_usuario_actual = (codigo_actual == session.get('vendedor_id'))
-    credenciales_cambiadas = (nuevo_codigo != codigo_actual or device_id != vendedor_actual.get('device_id', ''))
+    credenciales_cambiadas = (nuevo_codigo != codigo_actual or device_id != vendedor_actual.device_id)
     
     print(f"🔍 Editando: {codigo_actual} -> {nuevo_codigo}")
     print(f"🔍 Es usuario actual: {es_usuario_actual}")
@@ -355,21 +235,21 @@ def editar_vendedor(codigo_actual):
         
         if nuevo_codigo != codigo_actual:
             # Crear nuevo usuario
-            crear_vendedor(nuevo_codigo, {
+            repositorio.crear_vendedor(nuevo_codigo, {
                 'nombre': nombre,
                 'device_id': device_id,
                 'activo': activo,
                 'es_admin': es_admin,
-                'fecha_creacion': vendedor_actual.get('fecha_creacion', datetime.now().isoformat()),
-                'ultimo_acceso': vendedor_actual.get('ultimo_acceso'),
-                'accesos_totales': vendedor_actual.get('accesos_totales', 0)
+                'fecha_creacion': vendedor_actual.fecha_creacion or datetime.now().isoformat(),
+                'ultimo_acceso': vendedor_actual.ultimo_acceso,
+                'accesos_totales': vendedor_actual.accesos_totales
             })
             # Eliminar el viejo
-            eliminar_vendedor_db(codigo_actual)
+            repositorio.eliminar_vendedor(codigo_actual)
             codigo_final = nuevo_codigo
         else:
             # Actualizar existente
-            actualizar_vendedor(codigo_actual, {
+            repositorio.actualizar_vendedor(codigo_actual, {
                 'nombre': nombre,
                 'device_id': device_id,
                 'activo': activo,
@@ -405,7 +285,7 @@ def desloguear_vendedor(codigo):
     if not vendedor_autenticado() or not session.get('es_admin'):
         return jsonify({'error': 'No autorizado'}), 403
     
-    vendedor = obtener_vendedor(codigo)
+    vendedor = repositorio.obtener_vendedor(codigo)
     if not vendedor:
         return jsonify({'error': 'Vendedor no encontrado'}), 404
     
@@ -414,7 +294,7 @@ def desloguear_vendedor(codigo):
     
     return jsonify({
         'success': True,
-        'mensaje': f'Sesión cerrada forzadamente para {vendedor["nombre"]}. {sesiones_invalidadas} sesión(es) invalidada(s).'
+        'mensaje': f'Sesión cerrada forzadamente para {vendedor.nombre}. {sesiones_invalidadas} sesión(es) invalidada(s).'
     })
 
 @app.route('/admin/eliminar-vendedor/<codigo>', methods=['POST'])
@@ -426,18 +306,18 @@ def eliminar_vendedor(codigo):
     if codigo == 'DARKEYES':
         return jsonify({'error': 'No se puede eliminar al administrador principal'}), 400
     
-    vendedor = obtener_vendedor(codigo)
+    vendedor = repositorio.obtener_vendedor(codigo)
     if not vendedor:
         return jsonify({'error': 'Vendedor no encontrado'}), 404
     
     try:
         # Invalidar ANTES de eliminar
         invalidar_sesiones_vendedor(codigo)
-        eliminar_vendedor_db(codigo)
+        repositorio.eliminar_vendedor(codigo)
         
         return jsonify({
             'success': True,
-            'mensaje': f'Vendedor {vendedor["nombre"]} eliminado exitosamente'
+            'mensaje': f'Vendedor {vendedor.nombre} eliminado exitosamente'
         })
     except Exception as e:
         return jsonify({'error': f'Error eliminando vendedor: {str(e)}'}), 500
@@ -447,7 +327,8 @@ def listar_vendedores():
     """API para listar vendedores (JSON)"""
     if not vendedor_autenticado() or not session.get('es_admin'):
         return jsonify({'error': 'No autorizado'}), 403
-    return jsonify(cargar_vendedores())
+    return app.response_class(repositorio.vendedores_a_json(repositorio.cargar_vendedores()),
+                              mimetype='application/json')
 
 @app.route('/admin/historial-accesos')
 def historial_accesos():
@@ -455,28 +336,8 @@ def historial_accesos():
     if not vendedor_autenticado() or not session.get('es_admin'):
         return jsonify({'error': 'No autorizado'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT vendedor_id, dispositivo, exitoso, fecha_hora, ip 
-        FROM accesos 
-        ORDER BY fecha_hora DESC 
-        LIMIT 100
-    ''')
-    results = cursor.fetchall()
-    conn.close()
-    
-    accesos = []
-    for result in results:
-        accesos.append({
-            'vendedor_id': result[0],
-            'dispositivo': result[1],
-            'exitoso': result[2],
-            'fecha_hora': result[3],
-            'ip': result[4]
-        })
-    
-    return jsonify(accesos)
+    return app.response_class(repositorio.accesos_a_json(repositorio.historial_accesos(100)),
+                              mimetype='application/json')
 
 # ================= RUTAS GENERALES =================
 @app.route('/logout')
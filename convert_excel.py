@@ -1,13 +1,34 @@
 # convert_excel.py
 # Lee data/productos.xlsx y genera data/catalogo.json agrupando variantes por código.
 # No modifica tu Excel original.
+#
+# Modo varios proveedores:
+#   python convert_excel.py listas/                 (todos los .xlsx de la carpeta)
+#   python convert_excel.py "listas/*.xlsx" otro.xlsx --conflicto ultimo
+# Cada hoja se procesa en paralelo (un proceso por hoja) con el lector en
+# streaming de openpyxl y los resultados se fusionan por código.
 
-import pandas as pd
-import json, re, unicodedata
-from collections import OrderedDict
+import argparse, glob, json, os, re, time, unicodedata, zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import load_workbook
 
 INPUT = "data/productos.xlsx"
 OUTPUT_JSON = "data/catalogo.json"
+EXTENSIONES = (".xlsx", ".xlsm")
+
+# Detectar columnas clave (prueba varias opciones)
+candidates_code = ["codigo","cod","sku","id","ref","referencia"]
+candidates_name = ["nombre","producto","titulo","descripcion_corta"]
+candidates_desc = ["descripcion","detalle","descripcion_larga","observacion"]
+candidates_image = ["imagen","foto","img","imagen_url","url_imagen"]
+
+# Qué hacer cuando el mismo código aparece en varias hojas/archivos:
+#   fusionar -> se conserva el primero, se completan sus campos vacíos y se suman variantes nuevas
+#   primero  -> gana el primero que aparece (orden de archivos y hojas)
+#   ultimo   -> gana el último que aparece
+CONFLICTOS = ("fusionar", "primero", "ultimo")
 
 def normalize_key(s):
     s = "" if s is None else str(s)
@@ -17,28 +38,43 @@ def normalize_key(s):
     s = re.sub(r"_+", "_", s).strip("_")
     return s
 
-def main():
-    # Leer la primera hoja
-    df = pd.read_excel(INPUT, sheet_name=0, dtype=str).fillna("")
-    orig_cols = list(df.columns)
+def cell_to_str(val):
+    # Como el lector openpyxl de pandas (dtype=str + fillna("")): los float
+    # enteros pasan a int, así 7.5012345678901E+15 da "7501234567890100"
+    if val is None:
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    return str(val)
 
+def header_names(row):
+    # Cabeceras vacías y repetidas se nombran como lo hace pandas
+    names, seen = [], defaultdict(int)
+    for i, val in enumerate(row):
+        name = cell_to_str(val) or f"Unnamed: {i}"
+        if seen[name]:
+            unique = f"{name}.{seen[name]}"
+            while unique in seen:
+                seen[name] += 1
+                unique = f"{name}.{seen[name]}"
+            seen[unique] += 1
+            seen[name] += 1
+            name = unique
+        else:
+            seen[name] += 1
+        names.append(name)
+    return names
+
+def group_rows(orig_cols, rows, source=0):
+    # rows: pares (idx, valores); idx es la posición original de la fila de datos
     # Mapas entre nombre normalizado <-> nombre original (para mantener cabeceras legibles)
     norm_cols = [normalize_key(c) for c in orig_cols]
     norm_to_orig = dict(zip(norm_cols, orig_cols))
-    orig_to_norm = dict(zip(orig_cols, norm_cols))
-
-    # Renombrar columnas internamente a normalizadas
-    df.columns = norm_cols
-
-    # Detectar columnas clave (prueba varias opciones)
-    candidates_code = ["codigo","cod","sku","id","ref","referencia"]
-    candidates_name = ["nombre","producto","titulo","descripcion_corta"]
-    candidates_desc = ["descripcion","detalle","descripcion_larga","observacion"]
-    candidates_image = ["imagen","foto","img","imagen_url","url_imagen"]
+    columns = set(norm_cols)
 
     def find_col(cands):
         for c in cands:
-            if c in df.columns:
+            if c in columns:
                 return c
         return None
 
@@ -46,16 +82,16 @@ def main():
     name_col = find_col(candidates_name)
     desc_col = find_col(candidates_desc)
     image_col = find_col(candidates_image)
+    key_cols = {code_col, name_col, desc_col, image_col}
 
-    # Si no hay código, generar uno a partir del índice
-    if code_col is None:
-        code_col = "_generated_code"
-        df[code_col] = ["no_code_%d" % i for i in range(len(df))]
+    # Los códigos generados llevan el número de hoja para no mezclar hojas distintas
+    prefix = "no_code_" if source == 0 else f"no_code_{source}_"
 
     # Agrupar por código
     products = OrderedDict()
-    for idx, row in df.iterrows():
-        code = str(row.get(code_col, "")).strip() or f"no_code_{idx}"
+    for idx, values in rows:
+        row = dict(zip(norm_cols, values))
+        code = (row.get(code_col, "").strip() if code_col else "") or f"{prefix}{idx}"
         if code not in products:
             products[code] = {
                 "codigo": code,
@@ -67,26 +103,192 @@ def main():
 
         # Construir variante: incluir todas las columnas excepto codigo/nombre/desc/imagen
         variant = {}
-        for col in df.columns:
-            if col in [code_col, name_col, desc_col, image_col]:
+        for col, val in row.items():
+            if col in key_cols:
                 continue
-            val = row.get(col, "")
-            if str(val).strip() == "":
+            if val.strip() == "":
                 continue
             # Guardar la clave con el nombre original de la columna para legibilidad
-            orig_key = norm_to_orig.get(col, col)
-            variant[orig_key] = val
+            variant[norm_to_orig.get(col, col)] = val
 
         if not variant:
             variant = {"fila": str(idx)}
         products[code]["variantes"].append(variant)
 
+    return list(products.values())
+
+def parse_sheet(path, sheet, source=0):
+    # Se ejecuta en un proceso del pool: abre el libro en modo streaming y procesa una hoja
+    start = time.perf_counter()
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet]
+        if not hasattr(ws, "iter_rows"):
+            raise ValueError(f"la hoja '{sheet}' no es una hoja de datos")
+        # La <dimension> guardada por algunos programas es incorrecta y en modo
+        # read_only recortaría filas y columnas; pandas también la descarta
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return path, sheet, [], 0, time.perf_counter() - start
+        orig_cols = header_names(header)
+        width = len(orig_cols)
+        data = []
+        # Las filas en blanco se descartan, pero cuentan para idx: así los
+        # no_code_N y {"fila": N} coinciden con la posición que daba pandas
+        for idx, values in enumerate(rows):
+            values = [cell_to_str(v) for v in values[:width]]
+            if not any(values):
+                continue
+            values.extend([""] * (width - len(values)))
+            data.append((idx, values))
+    finally:
+        wb.close()
+    products = group_rows(orig_cols, data, source)
+    return path, sheet, products, len(data), time.perf_counter() - start
+
+def expand_inputs(inputs):
+    # Acepta archivos, carpetas o patrones glob; ignora los temporales "~$" de Excel
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            found = [os.path.join(entry, f) for f in os.listdir(entry)]
+        elif glob.has_magic(entry):
+            found = glob.glob(entry)
+        else:
+            found = [entry]
+        for path in sorted(found):
+            name = os.path.basename(path)
+            if name.startswith("~$") or not name.lower().endswith(EXTENSIONES):
+                continue
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def _rel_id(sheet):
+    # Atributo r:id de <sheet> (el namespace cambia entre OOXML transicional y estricto)
+    for key, value in sheet.attrib.items():
+        if key.endswith("}id"):
+            return value
+    return None
+
+def list_sheets(path, all_sheets):
+    # Solo lee xl/workbook.xml y sus relaciones: evita cargar shared strings y
+    # estilos en el proceso principal. Las hojas de gráfico se omiten, así
+    # "primera" es la primera hoja de datos, como sheet_name=0 en pandas.
+    with zipfile.ZipFile(path) as zf:
+        root = ET.fromstring(zf.read("xl/workbook.xml"))
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    types = {rel.get("Id"): rel.get("Type", "") for rel in rels.findall("{*}Relationship")}
+    names = [sheet.get("name") for sheet in root.findall("{*}sheets/{*}sheet")
+             if types.get(_rel_id(sheet), "").endswith("/worksheet")]
+    return names if all_sheets else names[:1]
+
+def merge_products(results, conflict):
+    merged = OrderedDict()
+    conflicts = 0
+    for products in results:
+        for product in products:
+            code = product["codigo"]
+            current = merged.get(code)
+            if current is None:
+                merged[code] = product
+                continue
+            conflicts += 1
+            if conflict == "ultimo":
+                merged[code] = product
+            elif conflict == "fusionar":
+                for field in ("nombre", "descripcion", "imagen"):
+                    if not str(current[field]).strip():
+                        current[field] = product[field]
+                for variant in product["variantes"]:
+                    if variant not in current["variantes"]:
+                        current["variantes"].append(variant)
+    return list(merged.values()), conflicts
+
+def convert(inputs, output, all_sheets, conflict, workers=None):
+    start = time.perf_counter()
+    paths = expand_inputs(inputs)
+    if not paths:
+        raise SystemExit(f"❌ No se encontraron archivos Excel en: {', '.join(inputs)}")
+
+    # Un libro o una hoja con errores se informa y se omite, sin cortar el resto
+    failures = []
+    tasks = []
+    for path in paths:
+        try:
+            tasks.extend((path, sheet) for sheet in list_sheets(path, all_sheets))
+        except Exception as e:
+            failures.append((path, None, e))
+
+    results = []
+    if workers == 1 or len(tasks) == 1:
+        for n, (path, sheet) in enumerate(tasks):
+            try:
+                results.append(parse_sheet(path, sheet, n))
+            except Exception as e:
+                failures.append((path, sheet, e))
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(parse_sheet, path, sheet, n) for n, (path, sheet) in enumerate(tasks)]
+            # Se recogen en el orden de las tareas para que la fusión sea determinista
+            for (path, sheet), future in zip(tasks, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    failures.append((path, sheet, e))
+
+    # Tiempo por archivo (suma de sus hojas)
+    per_file = OrderedDict((path, [0, 0, 0.0]) for path in paths)
+    for path, sheet, products, nrows, seconds in results:
+        stats = per_file[path]
+        stats[0] += 1
+        stats[1] += nrows
+        stats[2] += seconds
+    for path, (nsheets, nrows, seconds) in per_file.items():
+        print(f"⏱️  {path}: {nsheets} hoja(s), {nrows} filas en {seconds:.2f}s")
+    for path, sheet, error in failures:
+        where = f"{path} [{sheet}]" if sheet else path
+        print(f"❌ {where}: {type(error).__name__}: {error}")
+    if not results:
+        raise SystemExit("❌ No se pudo leer ninguna hoja; no se generó el catálogo.")
+
+    records, conflicts = merge_products((r[2] for r in results), conflict)
+
     # Guardar JSON
-    records = list(products.values())
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+    with open(output, "w", encoding="utf-8") as f:
         json.dump(records, f, ensure_ascii=False, indent=2)
 
-    print(f"✅ Generado {OUTPUT_JSON} con {len(records)} productos agrupados.")
+    if conflicts:
+        print(f"🔀 {conflicts} código(s) repetidos resueltos con la regla '{conflict}'.")
+    print(f"✅ Generado {output} con {len(records)} productos agrupados "
+          f"({time.perf_counter() - start:.2f}s).")
+    if failures:
+        raise SystemExit(f"⚠️ {len(failures)} hoja(s)/archivo(s) con errores quedaron fuera del catálogo.")
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("debe ser un entero mayor que 0")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera catalogo.json desde una o varias listas de precios en Excel.")
+    parser.add_argument("entradas", nargs="*",
+                        help=f"archivos, carpetas o patrones glob (por defecto {INPUT}, solo la primera hoja)")
+    parser.add_argument("-o", "--salida", default=OUTPUT_JSON)
+    parser.add_argument("--hojas", choices=("todas", "primera"),
+                        help="hojas a leer de cada libro (por defecto 'todas' si se indican entradas)")
+    parser.add_argument("--conflicto", choices=CONFLICTOS, default="fusionar",
+                        help="qué hacer si un código aparece en varias hojas/archivos")
+    parser.add_argument("-j", "--procesos", type=positive_int, default=None,
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    args = parser.parse_args()
+
+    inputs = args.entradas or [INPUT]
+    hojas = args.hojas or ("todas" if args.entradas else "primera")
+    convert(inputs, args.salida, hojas == "todas", args.conflicto, args.procesos)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,37 @@
 import os
+import queue
 import sqlite3
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime
 
+SQLITE_PATH = 'distrimundo.db'
+
+# Ajustes de SQLite para varios workers de gunicorn:
+# WAL (se fija una vez en init_db, queda guardado en el archivo) permite
+# lecturas concurrentes mientras hay una escritura en curso, y el timeout de
+# sqlite3.connect espera el lock en vez de fallar con "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+# PRAGMA que valen solo para la conexión y hay que aplicar en cada una
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -8000',
+    'PRAGMA temp_store = MEMORY',
+)
+
+# Máximo de escrituras que el escritor agrupa en una sola transacción
+SQLITE_MAX_LOTE = 64
+
+# Espera máxima de una escritura: cola del escritor + lock de otros workers
+SQLITE_ESPERA_ESCRITURA_S = 3 * SQLITE_BUSY_TIMEOUT_MS / 1000
+
+def _configurar_sqlite(conn):
+    """Aplica los PRAGMA por conexión a una conexión SQLite"""
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 def get_db_connection():
     if os.environ.get('RENDER'):
         # PostgreSQL en Render con psycopg3
@@ -9,10 +39,147 @@ def get_db_connection():
         conn = psycopg.connect(os.environ.get('DATABASE_URL'))
         return conn
     else:
-        # SQLite en local
-        conn = sqlite3.connect('distrimundo.db', check_same_thread=False)
+        # SQLite en local (modo WAL, lecturas concurrentes)
+        conn = sqlite3.connect(SQLITE_PATH, check_same_thread=False,
+                               timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
         conn.row_factory = sqlite3.Row
-        return conn
+        return _configurar_sqlite(conn)
+
+# ================= ESCRITOR ÚNICO DE SQLITE =================
+class EscritorSQLite:
+    """Hilo único que serializa y agrupa las escrituras de un proceso.
+
+    Cada petición se ejecuta dentro de su propio SAVEPOINT, así un error en
+    una no deshace las demás del mismo lote; el lote completo se confirma
+    con un solo COMMIT.
+    """
+
+    def __init__(self, ruta=SQLITE_PATH, max_lote=SQLITE_MAX_LOTE):
+        self.ruta = ruta
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._bucle, name='escritor-sqlite', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, sentencias):
+        """Encola una lista de (sql, params) y devuelve un Future con los rowcount"""
+        futuro = Future()
+        self._cola.put((list(sentencias), futuro))
+        return futuro
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.ruta, check_same_thread=False,
+                               timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                               isolation_level=None)
+        return _configurar_sqlite(conn)
+
+    def _tomar_lote(self):
+        """Espera la primera petición y agrupa las que ya estén en cola"""
+        lote = []
+        siguiente = self._cola.get()
+        while True:
+            # Las peticiones canceladas por timeout ya no se ejecutan
+            if siguiente[1].set_running_or_notify_cancel():
+                lote.append(siguiente)
+            if len(lote) >= self.max_lote:
+                return lote
+            try:
+                siguiente = self._cola.get_nowait()
+            except queue.Empty:
+                return lote
+
+    def _bucle(self):
+        conn = None
+        while True:
+            lote = self._tomar_lote()
+            if not lote:
+                continue
+            try:
+                if conn is None:
+                    conn = self._conectar()
+                self._procesar_lote(conn, lote)
+            except Exception as e:
+                # Un fallo (conexión, PRAGMA, ROLLBACK) no debe matar el hilo:
+                # se avisa a las peticiones pendientes y se reconecta en el siguiente lote
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+    def _procesar_lote(self, conn, lote):
+        resultados = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for sentencias, futuro in lote:
+                conn.execute('SAVEPOINT peticion')
+                try:
+                    filas = [conn.execute(sql, params).rowcount for sql, params in sentencias]
+                except Exception as e:
+                    conn.execute('ROLLBACK TO peticion')
+                    conn.execute('RELEASE peticion')
+                    resultados.append((futuro, None, e))
+                else:
+                    conn.execute('RELEASE peticion')
+                    resultados.append((futuro, filas, None))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        for futuro, filas, error in resultados:
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(filas)
+
+_escritor = None
+_escritor_pid = None
+_escritor_lock = threading.Lock()
+
+def _obtener_escritor():
+    """Devuelve el escritor del proceso actual (se recrea tras un fork de gunicorn o si su hilo murió)"""
+    global _escritor, _escritor_pid
+    with _escritor_lock:
+        if _escritor is None or _escritor_pid != os.getpid() or not _escritor._hilo.is_alive():
+            _escritor = EscritorSQLite()
+            _escritor_pid = os.getpid()
+        return _escritor
+
+def ejecutar_escritura(sentencias):
+    """Ejecuta una lista de (sql, params) en una sola transacción.
+
+    Devuelve la lista de rowcount de cada sentencia. En SQLite pasa por el
+    escritor único; en PostgreSQL usa una conexión normal.
+    """
+    if os.environ.get('RENDER'):
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            filas = []
+            for sql, params in sentencias:
+                cursor.execute(sql, params)
+                filas.append(cursor.rowcount)
+            conn.commit()
+            return filas
+        finally:
+            conn.close()
+    futuro = _obtener_escritor().enviar(sentencias)
+    try:
+        return futuro.result(timeout=SQLITE_ESPERA_ESCRITURA_S)
+    except FutureTimeoutError:
+        if futuro.cancel():
+            raise
+        # El escritor ya empezó el lote: la escritura terminará (commit o error),
+        # así que se espera el resultado real en vez de informar un fallo falso
+        return futuro.result()
 
 def get_param_placeholder():
     """Devuelve el placeholder correcto según la base de datos"""
@@ -23,6 +190,10 @@ def init_db():
     cursor = conn.cursor()
     param = get_param_placeholder()
     
+    if not os.environ.get('RENDER'):
+        # WAL queda guardado en el archivo: basta con fijarlo una vez
+        cursor.execute('PRAGMA journal_mode = WAL')
+    
     # Tabla vendedores
     if os.environ.get('RENDER'):
         # PostgreSQL
@@ -0,0 +1,179 @@
+# repositorio.py
+# Todo el SQL de vendedores, sesiones_activas y accesos vive aquí.
+# Las sentencias se generan una sola vez por dialecto (SQLite / PostgreSQL)
+# y las filas se devuelven como namedtuples en lugar de dicts nuevos.
+
+import json
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from database import get_db_connection, get_param_placeholder, ejecutar_escritura
+
+VENDEDOR_COLUMNAS = ('codigo', 'nombre', 'device_id', 'activo', 'es_admin',
+                     'fecha_creacion', 'ultimo_acceso', 'accesos_totales')
+ACCESO_COLUMNAS = ('vendedor_id', 'dispositivo', 'exitoso', 'fecha_hora', 'ip')
+
+# ================= REGISTROS =================
+# Codificador en C de la stdlib, sin ordenar claves ni espacios (jsonify ordena)
+_codificar = json.JSONEncoder(separators=(',', ':')).encode
+
+def _iso(valor):
+    """PostgreSQL devuelve datetime y SQLite texto: normalizamos a ISO 8601"""
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+class Vendedor(namedtuple('Vendedor', VENDEDOR_COLUMNAS)):
+    __slots__ = ()
+
+    @classmethod
+    def desde_fila(cls, fila):
+        codigo, nombre, device_id, activo, es_admin, creacion, ultimo, totales = fila
+        return cls(codigo, nombre, device_id or '', bool(activo), bool(es_admin),
+                   _iso(creacion), _iso(ultimo), totales or 0)
+
+class Acceso(namedtuple('Acceso', ACCESO_COLUMNAS)):
+    __slots__ = ()
+
+    @classmethod
+    def desde_fila(cls, fila):
+        vendedor_id, dispositivo, exitoso, fecha_hora, ip = fila
+        return cls(vendedor_id, dispositivo, bool(exitoso), _iso(fecha_hora), ip)
+
+def vendedores_a_json(vendedores):
+    """Texto JSON {codigo: vendedor}; el dict de cada fila solo vive mientras se codifica"""
+    return _codificar({codigo: dict(zip(VENDEDOR_COLUMNAS, vendedor))
+                       for codigo, vendedor in vendedores.items()})
+
+def accesos_a_json(accesos):
+    """Texto JSON [acceso, ...] para el historial"""
+    return _codificar([dict(zip(ACCESO_COLUMNAS, acceso)) for acceso in accesos])
+
+# ================= SENTENCIAS POR DIALECTO =================
+_PLANTILLAS = {
+    'vendedor_por_codigo': 'SELECT {vendedor} FROM vendedores WHERE codigo = {p}',
+    'vendedores': 'SELECT {vendedor} FROM vendedores ORDER BY codigo',
+    'crear_vendedor': '''
+        INSERT INTO vendedores
+        (codigo, nombre, device_id, activo, es_admin, fecha_creacion, accesos_totales)
+        VALUES ({p}, {p}, {p}, {p}, {p}, {p}, {p})
+    ''',
+    'actualizar_vendedor': '''
+        UPDATE vendedores
+        SET nombre = {p}, device_id = {p}, activo = {p}, es_admin = {p}, ultimo_acceso = {p}, accesos_totales = {p}
+        WHERE codigo = {p}
+    ''',
+    'registrar_ultimo_acceso': '''
+        UPDATE vendedores
+        SET ultimo_acceso = {p}, accesos_totales = COALESCE(accesos_totales, 0) + 1
+        WHERE codigo = {p}
+    ''',
+    'eliminar_vendedor': 'DELETE FROM vendedores WHERE codigo = {p}',
+    'crear_sesion': '''
+        INSERT INTO sesiones_activas (sesion_id, vendedor_id, dispositivo, ip)
+        VALUES ({p}, {p}, {p}, {p})
+    ''',
+    'invalidar_sesiones': '''
+        UPDATE sesiones_activas SET activa = FALSE, fecha_fin = {p}
+        WHERE vendedor_id = {p} AND activa = TRUE
+    ''',
+    'registrar_acceso': '''
+        INSERT INTO accesos (vendedor_id, dispositivo, exitoso, ip)
+        VALUES ({p}, {p}, {p}, {p})
+    ''',
+    'historial_accesos': '''
+        SELECT {acceso}
+        FROM accesos
+        ORDER BY fecha_hora DESC
+        LIMIT {p}
+    ''',
+}
+
+@lru_cache(maxsize=None)
+def _sentencias(placeholder):
+    """Construye el texto de cada sentencia una sola vez por dialecto.
+
+    Evita formatear el SQL en cada llamada. La caché de sentencias preparadas
+    de sqlite3 (y el prepare_threshold de psycopg) es por conexión, así que
+    solo la aprovecha la conexión persistente del escritor de SQLite; las
+    lecturas abren una conexión nueva cada vez y se preparan de nuevo.
+    """
+    return {
+        nombre: plantilla.format(p=placeholder,
+                                 vendedor=', '.join(VENDEDOR_COLUMNAS),
+                                 acceso=', '.join(ACCESO_COLUMNAS))
+        for nombre, plantilla in _PLANTILLAS.items()
+    }
+
+def _sql(nombre):
+    return _sentencias(get_param_placeholder())[nombre]
+
+def _consultar(nombre, params=(), uno=False):
+    """Ejecuta una lectura y devuelve la fila (uno=True) o todas las filas"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_sql(nombre), params)
+        return cursor.fetchone() if uno else cursor.fetchall()
+    finally:
+        conn.close()
+
+# ================= VENDEDORES =================
+def obtener_vendedor(codigo):
+    """Devuelve el Vendedor con ese código o None"""
+    fila = _consultar('vendedor_por_codigo', (codigo,), uno=True)
+    return Vendedor.desde_fila(fila) if fila else None
+
+def cargar_vendedores():
+    """Carga todos los vendedores indexados por código"""
+    return {fila[0]: Vendedor.desde_fila(fila) for fila in _consultar('vendedores')}
+
+def crear_vendedor(codigo, datos):
+    """Crea un nuevo vendedor"""
+    ejecutar_escritura([(_sql('crear_vendedor'), (
+        codigo,
+        datos['nombre'],
+        datos.get('device_id', ''),
+        datos.get('activo', True),
+        datos.get('es_admin', False),
+        datetime.now().isoformat(),
+        datos.get('accesos_totales', 0)
+    ))])
+
+def actualizar_vendedor(codigo, datos):
+    """Actualiza los datos de un vendedor"""
+    ejecutar_escritura([(_sql('actualizar_vendedor'), (
+        datos['nombre'],
+        datos.get('device_id', ''),
+        datos.get('activo', True),
+        datos.get('es_admin', False),
+        datos.get('ultimo_acceso'),
+        datos.get('accesos_totales', 0),
+        codigo
+    ))])
+
+def eliminar_vendedor(codigo):
+    """Elimina un vendedor de la base de datos"""
+    ejecutar_escritura([(_sql('eliminar_vendedor'), (codigo,))])
+
+# ================= SESIONES Y ACCESOS =================
+def registrar_login(sesion_id, codigo, dispositivo, ip):
+    """Registra un login exitoso: sesión, último acceso y acceso en una transacción"""
+    ejecutar_escritura([
+        (_sql('crear_sesion'), (sesion_id, codigo, dispositivo, ip)),
+        (_sql('registrar_ultimo_acceso'), (datetime.now().isoformat(), codigo)),
+        (_sql('registrar_acceso'), (codigo, dispositivo, True, ip)),
+    ])
+
+def invalidar_sesiones(vendedor_id):
+    """Invalida todas las sesiones activas de un vendedor y devuelve cuántas"""
+    filas, = ejecutar_escritura([
+        (_sql('invalidar_sesiones'), (datetime.now().isoformat(), vendedor_id))
+    ])
+    return filas
+
+def registrar_acceso(vendedor_id, dispositivo, exitoso, ip):
+    """Registra un intento de acceso"""
+    ejecutar_escritura([(_sql('registrar_acceso'), (vendedor_id, dispositivo, exitoso, ip))])
+
+def historial_accesos(limite=100):
+    """Devuelve los últimos accesos, del más reciente al más antiguo"""
+    return [Acceso.desde_fila(fila) for fila in _consultar('historial_accesos', (limite,))]